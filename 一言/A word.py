@@ -1,28 +1,55 @@
 # vocab.py
 import os
+import re
+import mmap
+import atexit
 import random
 import time
 import json
-from datetime import datetime, date
+from array import array
+from datetime import datetime, date, timedelta
 
 # -------------------- 配置读写 --------------------
 SETTINGS_PATH = os.path.join(os.path.dirname(__file__), "settings.txt")
+PARSE_VERSION = 3  # 词表解析规则或缓存格式变化时递增，旧的解析缓存随之失效
+_SETTING_RE = re.compile(r'^\s*(\w+)\s*=\s*"?([^"\n]*?)"?\s*$', re.M)
+_settings_on_disk = None  # settings.txt 当前内容，内容不变时跳过写盘
 
 def load_settings():
+    global _settings_on_disk
     cfg = {"DAILY_NEW_LIMIT": "50", "TODAY_COUNT": "0", "TODAY_DATE": ""}
     if os.path.exists(SETTINGS_PATH):
         with open(SETTINGS_PATH, encoding="utf-8") as f:
-            for ln in f:
-                ln = ln.strip()
-                if "=" in ln:
-                    k, v = ln.split("=", 1)
-                    cfg[k.strip()] = v.strip().strip('"')
+            data = f.read()
+        cfg.update(_SETTING_RE.findall(data))
+        _settings_on_disk = data
     return cfg
 
 def save_settings(cfg):
+    global _settings_on_disk
+    data = "".join(f'{k} = "{v}"\n' for k, v in cfg.items())
+    if data == _settings_on_disk:
+        return
     with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
-        for k, v in cfg.items():
-            f.write(f'{k} = "{v}"\n')
+        f.write(data)
+    _settings_on_disk = data
+
+# -------------------- 单词记录 --------------------
+class Word:
+    """已学单词的学习状态，用 __slots__ 省去每条记录的 dict"""
+    __slots__ = ("word", "translation", "ef", "n", "interval", "last_review")
+
+    def __init__(self, word, translation, ef, n, interval, last_review):
+        self.word = word
+        self.translation = translation
+        self.ef = ef
+        self.n = n
+        self.interval = interval
+        self.last_review = last_review
+
+    # JSON / 日志里的一行
+    def to_row(self):
+        return [self.word, self.translation, self.ef, self.n, self.interval, self.last_review]
 
 # -------------------- 文件管理 --------------------
 class WordListManager:
@@ -30,6 +57,14 @@ class WordListManager:
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
         self.assets_dir = os.path.join(self.script_dir, "assets")
         os.makedirs(self.assets_dir, exist_ok=True)
+        # 本次运行内已解析的词表: path -> ([版本, mtime_ns, size], pairs, 非空行数)
+        self._parse_cache = {}
+        # 载入时得到的总数及其对应的词表状态: path -> ([mtime_ns, size], total)
+        self._totals = {}
+        # 当前打开的追加日志: (path, file)
+        self._journal = None
+        # 统计摘要: path -> (文件状态, (已学数, 掌握数, 总数))
+        self._summary_cache = {}
 
     # 发现用户词表
     def find_user_wordlists(self):
@@ -45,47 +80,229 @@ class WordListManager:
         base = os.path.splitext(os.path.basename(wordlist_path))[0]
         return os.path.join(self.assets_dir, f"_{base}.json")
 
+    # 增量日志路径：每行一条单词最新状态，合并进 JSON 后删除
+    def get_journal_file(self, wordlist_path):
+        base = os.path.splitext(os.path.basename(wordlist_path))[0]
+        return os.path.join(self.assets_dir, f"_{base}.ndjson")
+
+    # 原始词表解析结果缓存路径
+    def get_parse_cache_file(self, wordlist_path):
+        base = os.path.splitext(os.path.basename(wordlist_path))[0]
+        return os.path.join(self.assets_dir, f"_{base}.pairs")
+
+    # 解析原始词表 -> [(单词, 释义), ...]
+    def parse_wordlist(self, wordlist_path):
+        return self._parse(wordlist_path)[1]
+
+    # 解析原始词表，顺带统计非空行数；按解析版本和 mtime 复用 JSON 缓存
+    def _parse(self, wordlist_path):
+        st = os.stat(wordlist_path)
+        key = [PARSE_VERSION, st.st_mtime_ns, st.st_size]
+        hit = self._parse_cache.get(wordlist_path)
+        if hit and hit[0] == key:
+            return hit
+
+        cache = self.get_parse_cache_file(wordlist_path)
+        if os.path.exists(cache):
+            try:
+                with open(cache, "rb") as f:
+                    doc = json.load(f)
+                if doc.get("KEY") == key:
+                    hit = (key, doc["PAIRS"], doc["TOTAL"])
+                    self._parse_cache[wordlist_path] = hit
+                    return hit
+            except Exception:
+                # 缓存损坏，重新解析
+                pass
+
+        pairs = []
+        total = 0
+        if st.st_size:
+            with open(wordlist_path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos, end = 0, len(mm)
+                while pos < end:
+                    nl = mm.find(b"\n", pos)
+                    if nl < 0:
+                        nl = end
+                    ln = mm[pos:nl].decode("utf-8").strip()
+                    pos = nl + 1
+                    if not ln:
+                        continue
+                    total += 1
+                    # 有制表符时必须恰好一个；否则按第一段空白（含全角空格）切分
+                    word, sep, trans = ln.partition('\t')
+                    if sep:
+                        if '\t' not in trans:
+                            pairs.append((word, trans))
+                        continue
+                    p = ln.split(None, 1)
+                    if len(p) == 2:
+                        pairs.append((p[0], p[1]))
+        try:
+            with open(cache, "wb") as f:
+                f.write(json.dumps({"KEY": key, "TOTAL": total, "PAIRS": pairs}, ensure_ascii=False,
+                                   separators=(",", ":")).encode("utf-8"))
+        except OSError:
+            pass
+        hit = (key, pairs, total)
+        self._parse_cache[wordlist_path] = hit
+        return hit
+
     # 读取词表 & JSON 缓存
     def load_wordlist(self, wordlist_path):
         cache = self.get_cache_file(wordlist_path)
 
-        # 总单词数
-        with open(wordlist_path, encoding="utf-8") as f:
-            raw = [ln.strip() for ln in f if ln.strip()]
-        total = len(raw)
-
+        doc = {}
         learned = []
         if os.path.exists(cache):
             try:
                 with open(cache, encoding="utf-8") as f:
-                    data = json.load(f).get("WORDLIST", [])
-                learned = [
-                    {
-                        "word": w[0], "translation": w[1],
-                        "ef": float(w[2]), "n": int(w[3]),
-                        "interval": float(w[4]), "last_review": int(w[5])
-                    }
-                    for w in data
-                ]
+                    doc = json.load(f)
+                data = doc.get("WORDLIST", [])
+                learned = [self._row_to_word(r) for r in data]
             except Exception:
                 # 缓存损坏，重新生成
-                pass
+                doc = {}
+        source, total = self._cached_total(wordlist_path, doc)
+        self._totals[wordlist_path] = (source, total)
+
+        # 合并上次未压缩的增量日志
+        journal = self.get_journal_file(wordlist_path)
+        if os.path.exists(journal):
+            pos = {w.word: i for i, w in enumerate(learned)}
+            with open(journal, "rb") as f:
+                for ln in f:
+                    try:
+                        w = self._row_to_word(json.loads(ln.decode("utf-8")))
+                    except Exception:
+                        # 崩溃时写了一半的行（可能断在多字节字符中间）
+                        continue
+                    i = pos.get(w.word)
+                    if i is None:
+                        pos[w.word] = len(learned)
+                        learned.append(w)
+                    else:
+                        learned[i] = w
         return learned, total
 
+    # 总单词数（非空行数）及其对应的词表状态 [mtime_ns, size]
+    # 词表没改过就用缓存头里记下的总数，否则取解析时一并统计的行数
+    def _cached_total(self, wordlist_path, doc):
+        st = os.stat(wordlist_path)
+        source = [st.st_mtime_ns, st.st_size]
+        if "TOTAL" in doc and doc.get("SOURCE") == source:
+            return source, doc["TOTAL"]
+        key, _, total = self._parse(wordlist_path)
+        return key[1:], total
+
+    # 只统计 (已学数, 掌握数, 总数)：直接读原始行，不构造单词字典
+    def count_stats(self, wordlist_path):
+        doc = {}
+        cache = self.get_cache_file(wordlist_path)
+        if os.path.exists(cache):
+            try:
+                with open(cache, "rb") as f:
+                    doc = json.load(f)
+            except Exception:
+                pass
+        rows = doc.get("WORDLIST", [])
+
+        journal = self.get_journal_file(wordlist_path)
+        if os.path.exists(journal):
+            iv = {r[0]: r[4] for r in rows}
+            with open(journal, "rb") as f:
+                for ln in f:
+                    try:
+                        r = json.loads(ln.decode("utf-8"))
+                        iv[r[0]] = r[4]
+                    except Exception:
+                        continue
+            intervals = list(iv.values())
+        else:
+            intervals = [r[4] for r in rows]
+        _, total = self._cached_total(wordlist_path, doc)
+        return len(intervals), sum(1 for v in intervals if v >= 21), total
+
+    # JSON / 日志里的一行 -> Word，缓存和日志共用
+    @staticmethod
+    def _row_to_word(row):
+        w, t, ef, n, iv, last = row
+        return Word(w, t, float(ef), int(n), float(iv), int(last))
+
+    # 追加一条单词状态到增量日志
+    def append_journal(self, path, w):
+        if not self._journal or self._journal[0] != path:
+            self.close_journal()
+            f = open(self.get_journal_file(path), "a+b")
+            # 上次崩溃留下的半行不能和新记录粘在一起
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            self._journal = (path, f)
+        f = self._journal[1]
+        f.write(json.dumps(w.to_row(), ensure_ascii=False).encode("utf-8") + b"\n")
+        f.flush()
+
+    def close_journal(self):
+        if self._journal:
+            self._journal[1].close()
+            self._journal = None
+
+    def _drop_journal(self, path):
+        self.close_journal()
+        journal = self.get_journal_file(path)
+        if os.path.exists(journal):
+            os.remove(journal)
+            return True
+        return False
+
+    # 学习进度摘要 (已学数, 掌握数, 总数)，相关文件都没变时直接复用
+    def summary(self, wordlist_path):
+        key = []
+        for p in (wordlist_path, self.get_cache_file(wordlist_path), self.get_journal_file(wordlist_path)):
+            try:
+                st = os.stat(p)
+                key.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                key.append(None)
+        key = tuple(key)
+        hit = self._summary_cache.get(wordlist_path)
+        if hit and hit[0] == key:
+            return hit[1]
+
+        result = self.count_stats(wordlist_path)
+        self._summary_cache[wordlist_path] = (key, result)
+        return result
+
     # 保存 JSON 缓存
     def save_wordlist(self, path, words):
         cache = self.get_cache_file(path)
-        data = [[w["word"], w["translation"], w["ef"], w["n"], w["interval"], w["last_review"]] for w in words]
-        with open(cache, "w", encoding="utf-8") as f:
-            json.dump({"WORDLIST": data}, f, ensure_ascii=False, indent=0)
+        data = [w.to_row() for w in words]
+        doc = {"WORDLIST": data}
+        # 总数和它对应的词表状态是载入时一起取的，会话中改了词表也不会配错
+        if path in self._totals:
+            doc["SOURCE"], doc["TOTAL"] = self._totals[path]
+        # 紧凑格式走 json 的 C 编码器；先写临时文件再原子替换，中途崩溃不会损坏缓存
+        buf = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        tmp = cache + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(buf)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, cache)
+        # 日志内容已全部并入 JSON
+        self._drop_journal(path)
 
     # 重置进度
     def reset_wordlist(self, path):
         cache = self.get_cache_file(path)
+        removed = self._drop_journal(path)
         if os.path.exists(cache):
             os.remove(cache)
             return True
-        return False
+        return removed
 
 # -------------------- Anki/SM-2 算法 --------------------
 class MemoryAlgorithm:
@@ -107,11 +324,98 @@ class MemoryAlgorithm:
         return max(ef, 1.3)
 
     @staticmethod
-    def review_weight(w, now):
-        elapsed = (now - w["last_review"]) / (86400 * 1000)
-        return elapsed / w["interval"] if w["interval"] > 0 else 1.0
+    def review_coeffs(last_review, interval, t0):
+        """复习权重 = 已过天数 / 间隔（间隔为 0 时恒为 1），
+        写成 (now - t0) * rate - offset 的线性形式返回 (rate, offset)"""
+        if interval <= 0:
+            return 0.0, -1.0
+        rate = 1 / (86400 * 1000 * interval)
+        return rate, (last_review - t0) * rate
+
+# -------------------- 复习抽样 --------------------
+class ReviewSampler:
+    """按复习权重加权抽取复习单词的下标
+
+    权重 (now - t0) * rate - offset 与 now 呈线性（见 MemoryAlgorithm.review_coeffs），
+    rate / offset 各存一棵树状数组，修改、追加、抽样都是 O(log n)，时间推移也无需重建
+    """
+
+    def __init__(self, words, t0):
+        self.t0 = t0
+        # 每个单词预先算好的系数
+        self.rate = array('d')
+        self.off = array('d')
+        for w in words:
+            r, o = self._coeffs(w.last_review, w.interval)
+            self.rate.append(r)
+            self.off.append(o)
+        n = len(words)
+        rate, off = [0.0] + self.rate.tolist(), [0.0] + self.off.tolist()
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                rate[j] += rate[i]
+                off[j] += off[i]
+        self._tree_rate, self._tree_off = rate, off
+
+    def __len__(self):
+        return len(self.rate)
+
+    def _coeffs(self, last, interval):
+        return MemoryAlgorithm.review_coeffs(last, interval, self.t0)
+
+    def append(self, last, interval):
+        r, o = self._coeffs(last, interval)
+        self.rate.append(r)
+        self.off.append(o)
+        # 新节点 i 覆盖 (i - lowbit(i), i]
+        i = len(self._tree_rate)
+        j, stop = i - 1, i - (i & -i)
+        while j > stop:
+            r += self._tree_rate[j]
+            o += self._tree_off[j]
+            j -= j & -j
+        self._tree_rate.append(r)
+        self._tree_off.append(o)
+
+    def update(self, idx, last, interval):
+        r, o = self._coeffs(last, interval)
+        dr, do = r - self.rate[idx], o - self.off[idx]
+        self.rate[idx] = r
+        self.off[idx] = o
+        i, n = idx + 1, len(self.rate)
+        while i <= n:
+            self._tree_rate[i] += dr
+            self._tree_off[i] += do
+            i += i & -i
+
+    def pick(self, now):
+        """在树上边下降边累加权重，找到第一个累计权重 >= 随机阈值的下标"""
+        n = len(self.rate)
+        dt = now - self.t0
+        rate, off = self._tree_rate, self._tree_off
+        total_r = total_o = 0.0
+        i = n
+        while i:
+            total_r += rate[i]
+            total_o += off[i]
+            i -= i & -i
+        x = random.random() * (dt * total_r - total_o)
+
+        pos, acc_r, acc_o = 0, 0.0, 0.0
+        step = 1 << (n.bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt <= n and dt * (acc_r + rate[nxt]) - (acc_o + off[nxt]) < x:
+                pos = nxt
+                acc_r += rate[nxt]
+                acc_o += off[nxt]
+            step >>= 1
+        return min(pos, n - 1)
 
 # -------------------- 主程序 --------------------
+COMPACT_EVERY = 100  # 增量日志累计多少条后合并进 JSON
+
 class VocabularyApp:
     def __init__(self):
         self.mgr = WordListManager()
@@ -119,14 +423,21 @@ class VocabularyApp:
         self.curr = None
         self.words = []
         self._all_words = None
+        self._unlearned = []  # 未学单词在 _all_words 中的下标
+        self._new_pos = None  # 上次抽中的新词在 _unlearned 中的位置
+        self._learned = set()
         self.total = 0
         self.idx = 0
         self.rand = False
         self.review_only = False
+        self._pending = 0  # 只在日志里、尚未合并进 JSON 的修改数
+        # 复习抽样索引，与 self.words 一一对应
+        self._sampler = ReviewSampler([], 0)
 
         self.cfg = load_settings()
         self.limit = int(self.cfg["DAILY_NEW_LIMIT"])
         self.today = str(date.today())
+        self._midnight_ms_next = self._next_midnight_ms()
         self.today_count = int(self.cfg["TODAY_COUNT"])
         if self.cfg["TODAY_DATE"] != self.today:
             self.today_count = 0
@@ -156,6 +467,7 @@ class VocabularyApp:
                     self.curr = self.wordlists[idx]
                     self.words, self.total = self.mgr.load_wordlist(self.curr['path'])
                     self._all_words = None
+                    self.reset_review_index()
                     return True
                 print("编号超出范围")
             except ValueError:
@@ -164,45 +476,47 @@ class VocabularyApp:
     def _load_all(self):
         if not self.curr:
             return
-        with open(self.curr['path'], encoding='utf-8') as f:
-            lines = [ln.strip() for ln in f if ln.strip()]
+        learned = self._learned
         self._all_words = [
-            {"word": p[0], "translation": p[1], "is_learned": False}
-            for ln in lines
-            for p in [ln.split('\t') if '\t' in ln else ln.split(maxsplit=1)]
-            if len(p) == 2
+            {"word": word, "translation": trans, "is_learned": word in learned}
+            for word, trans in self.mgr.parse_wordlist(self.curr['path'])
         ]
-        learned_words = {w['word'] for w in self.words}
-        for w in self._all_words:
-            w['is_learned'] = w['word'] in learned_words
+        self._unlearned = [i for i, w in enumerate(self._all_words) if not w["is_learned"]]
 
     def save(self):
         if not self.curr:
             return
         self.mgr.save_wordlist(self.curr['path'], self.words)
         save_settings(self.cfg)
+        self._pending = 0
 
-    def get_word(self):
-        if str(date.today()) != self.today:
-            self.today = str(date.today())
-            self.today_count = 0
-            self.cfg["TODAY_DATE"] = self.today
-            self.cfg["TODAY_COUNT"] = 0
-            save_settings(self.cfg)
-
-        now = int(time.time() * 1000)
+    @staticmethod
+    def _next_midnight_ms():
+        tomorrow = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        return int(tomorrow.timestamp() * 1000)
+
+    def get_word(self, now=None):
+        if now is None:
+            now = time.time_ns() // 1_000_000
+        # 只有跨过午夜才需要重新取日期
+        if now >= self._midnight_ms_next:
+            self._midnight_ms_next = self._next_midnight_ms()
+            today = str(date.today())
+            if today != self.today:
+                self.today = today
+                self.today_count = 0
+                self.cfg["TODAY_DATE"] = self.today
+                self.cfg["TODAY_COUNT"] = 0
+                save_settings(self.cfg)
 
         # 新词
         if not self.review_only and self.today_count < self.limit:
-            unlearned = [w for w in self.all_words if not w["is_learned"]]
-            if unlearned:
-                w = random.choice(unlearned)
-                new_word = {
-                    "word": w["word"], "translation": w["translation"],
-                    "ef": MemoryAlgorithm.initial_ef(), "n": 0,
-                    "interval": 1, "last_review": now,
-                    "is_new": True, "learn_date": str(date.today())
-                }
+            all_words = self.all_words
+            if self._unlearned:
+                self._new_pos = random.randrange(len(self._unlearned))
+                w = all_words[self._unlearned[self._new_pos]]
+                new_word = Word(w["word"], w["translation"],
+                                MemoryAlgorithm.initial_ef(), 0, 1, now)
                 return {
                     "word": w["word"], "translation": w["translation"],
                     "is_new": True, "temp_new_word": new_word
@@ -210,36 +524,75 @@ class VocabularyApp:
 
         # 复习
         if self.words:
-            weights = [MemoryAlgorithm.review_weight(w, now) for w in self.words]
-            self.idx = random.choices(range(len(self.words)), weights=weights)[0]
-            return self.words[self.idx]
+            self._sync_sampler()
+            self.idx = self._sampler.pick(now)
+            w = self.words[self.idx]
+            return {
+                "word": w.word, "translation": w.translation,
+                "ef": w.ef, "interval": w.interval, "last_review": w.last_review
+            }
 
         if not self.words and self.all_words:
             return {"error": "no_learned_words"}
         return {"error": "no_words"}
 
+    def mark_learned(self):
+        """把 get_word 抽中的新词标记为已学，与末尾交换后删除，O(1)"""
+        ul = self._unlearned
+        entry = self._all_words[ul[self._new_pos]]
+        entry["is_learned"] = True
+        self._learned.add(entry["word"])
+        ul[self._new_pos] = ul[-1]
+        ul.pop()
+        self._new_pos = None
+
+    def reset_review_index(self):
+        """self.words 被整体替换后调用"""
+        words = self.words
+        self._learned = {w.word for w in words}
+        self._sampler = ReviewSampler(words, time.time_ns() // 1_000_000)
+
+    def _sync_sampler(self):
+        """把新追加到 self.words 的单词补进抽样索引"""
+        for w in self.words[len(self._sampler):]:
+            self._sampler.append(w.last_review, w.interval)
+
     def answer(self, q: int):
         w = self.words[self.idx]
-        now = int(time.time() * 1000)
+        now = time.time_ns() // 1_000_000
 
         if q < 3:
-            w["n"] = 0
-            w["interval"] = MemoryAlgorithm.initial_interval(0)
+            w.n = 0
+            w.interval = MemoryAlgorithm.initial_interval(0)
         else:
-            w["n"] += 1
-            w["ef"] = MemoryAlgorithm.update_ef(w["ef"], q)
-            if w["n"] == 1:
-                w["interval"] = MemoryAlgorithm.initial_interval(1)
+            w.n += 1
+            w.ef = MemoryAlgorithm.update_ef(w.ef, q)
+            if w.n == 1:
+                w.interval = MemoryAlgorithm.initial_interval(1)
             else:
-                w["interval"] = MemoryAlgorithm.next_interval(w["interval"], w["ef"])
-        w["last_review"] = now
-        w.pop("is_new", None)
+                w.interval = MemoryAlgorithm.next_interval(w.interval, w.ef)
+        w.last_review = now
+        self._sync_sampler()
+        self._sampler.update(self.idx, now, w.interval)
+        self.flush()
 
     def flush(self):
-        """立即写盘"""
+        """把刚修改的单词追加到增量日志并同步设置，合并由 maybe_flush / _force_flush 完成"""
         if self.curr:
-            self.mgr.save_wordlist(self.curr['path'], self.words)
-            save_settings(self.cfg)
+            self.mgr.append_journal(self.curr['path'], self.words[self.idx])
+            self._pending += 1
+        # 内容没变时 save_settings 不写盘，复习旧词不产生额外 I/O
+        save_settings(self.cfg)
+
+    def maybe_flush(self):
+        """日志累计 COMPACT_EVERY 条后合并进 JSON"""
+        if self._pending >= COMPACT_EVERY:
+            self._force_flush()
+
+    def _force_flush(self):
+        """有未合并的修改时立即写盘"""
+        if self._pending:
+            self.save()
 
 # -------------------- UI --------------------
 class UI:
@@ -322,8 +675,8 @@ class UI:
 
     @staticmethod
     def stats(app):
-        app.save()          # 先落盘
-        mgr = WordListManager()
+        app._force_flush()  # 先落盘
+        mgr = app.mgr
         wordlists = mgr.find_user_wordlists()
         if not wordlists:
             print("\n📚 词典学习进度:")
@@ -337,11 +690,9 @@ class UI:
         print("-" * 52)
         for wl in wordlists:
             try:
-                learned, total = mgr.load_wordlist(wl['path'])
+                learned_cnt, known_cnt, total = mgr.summary(wl['path'])
                 if total == 0:
                     continue
-                learned_cnt = len(learned)
-                known_cnt   = sum(1 for w in learned if w["interval"] >= 21)
 
                 learned_ratio = learned_cnt / total * 100
                 mastery_ratio = known_cnt / learned_cnt * 100 if learned_cnt else 0.0
@@ -370,11 +721,12 @@ class UI:
 def main():
     try:
         app = VocabularyApp()
+        atexit.register(app._force_flush)
         if not app.select_wordlist():
             return
         while True:
             UI.banner(app)
-            w = app.get_word()
+            w = app.get_word(time.time_ns() // 1_000_000)
             if w and "error" in w and w["error"] == "no_learned_words":
                 print("\n⚠️ 当前词典没有已学单词")
                 input("按回车键返回学习模式...")
@@ -391,15 +743,11 @@ def main():
                     new_word = w["temp_new_word"]
                     app.words.append(new_word)
                     app.idx = len(app.words) - 1
-                    for a in app.all_words:
-                        if a["word"] == new_word["word"]:
-                            a["is_learned"] = True
-                            break
+                    app.mark_learned()
                     app.today_count += 1
                     app.cfg["TODAY_COUNT"] = app.today_count
-                    save_settings(app.cfg)
                 app.answer(q)
-                app.flush()
+                app.maybe_flush()
             elif act == 'd':
                 q = UI.explain(w)
                 if q is None:
@@ -408,15 +756,11 @@ def main():
                     new_word = w["temp_new_word"]
                     app.words.append(new_word)
                     app.idx = len(app.words) - 1
-                    for a in app.all_words:
-                        if a["word"] == new_word["word"]:
-                            a["is_learned"] = True
-                            break
+                    app.mark_learned()
                     app.today_count += 1
                     app.cfg["TODAY_COUNT"] = app.today_count
-                    save_settings(app.cfg)
                 app.answer(q)
-                app.flush()
+                app.maybe_flush()
             elif act == 's':
                 UI.stats(app)
             elif act == 'r':
@@ -426,7 +770,7 @@ def main():
                 app.review_only = not app.review_only
                 time.sleep(0.8)
             elif act == 'c':
-                app.save()
+                app._force_flush()
                 if app.select_wordlist():
                     continue
                 else:
@@ -437,6 +781,8 @@ def main():
                         if app.mgr.reset_wordlist(app.curr['path']):
                             app.words, app.total = app.mgr.load_wordlist(app.curr['path'])
                             app._all_words = None
+                            app.reset_review_index()
+                            app._pending = 0  # 日志已随进度一起删除
                             print(f"\n✅ 已重置词表: {app.curr['name']}")
                             time.sleep(1)
                 else:
@@ -448,10 +794,10 @@ def main():
                 break
             else:
                 app.answer(0)
-                app.flush()
+                app.maybe_flush()
     except KeyboardInterrupt:
         try:
-            app.save()
+            app._force_flush()
         except:
             pass
         print("\n💾 已强制保存，bye~")